@@ -1,9 +1,13 @@
 """Rozetka AI Sales Agent - Autonomous outbound sales with upsells and human handoff."""
 
+import asyncio
 import logging
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 import httpx
+import orjson
 from dotenv import load_dotenv
 from livekit import rtc
 from livekit.agents import (
@@ -28,6 +32,25 @@ load_dotenv(".env.local")
 # Telegram webhook URL for sending links
 TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL", "http://localhost:8000/send-link")
 
+# Dashboard endpoint that lets a human operator pick up a handoff
+HANDOFF_REGISTER_URL = "http://localhost:3000/api/handoffs/register"
+
+# Only the most recent history items are passed to the human operator
+HANDOFF_TRANSCRIPT_ITEMS = 30
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Create the long-lived HTTP client shared by the agent's tools.
+
+    Reusing one pooled client keeps connections to the webhook and dashboard
+    alive between tool calls instead of reconnecting on every request.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(10.0, connect=2.0),
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    )
+
 
 SALES_PROMPT = """You are a friendly and professional sales agent for Rozetka, Ukraine's largest e-commerce platform.
 You are calling customers who have recently placed an order to confirm their purchase and offer relevant upsells.
@@ -65,14 +88,17 @@ class RozetkaSalesAgent(Agent):
         call_id: str | None = None,
         firebase: FirebaseService | None = None,
         room: rtc.Room | None = None,
+        http: httpx.AsyncClient | None = None,
     ) -> None:
         self.order_context = order_context or {}
         self.call_id = call_id
         self.firebase = firebase
         self.room = room
+        self.http = http
         self._handoff_pending = False  # Track if waiting for human operator
 
-        # Build dynamic instructions with order context
+        # Build dynamic instructions with order context: the static prompt
+        # always comes first and per-call context is appended after it
         instructions = SALES_PROMPT
         if order_context:
             instructions += f"""
@@ -87,6 +113,46 @@ Current call context:
 
         super().__init__(instructions=instructions)
 
+    @asynccontextmanager
+    async def _http_client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """Yield the injected client, or a short-lived one closed after use."""
+        if self.http is not None:
+            yield self.http
+            return
+
+        async with _create_http_client() as client:
+            yield client
+
+    async def _register_handoff(
+        self, room_name: str, reason: str, transcript: list[dict[str, str]]
+    ) -> None:
+        """Register the handoff with the dashboard so a human can pick it up."""
+        async with self._http_client() as http:
+            await http.post(
+                HANDOFF_REGISTER_URL,
+                json={
+                    "call_id": self.call_id,
+                    "room_name": room_name,
+                    "phone_number": self.order_context.get("phone", "Unknown"),
+                    "customer_name": self.order_context.get(
+                        "customer_name", "Customer"
+                    ),
+                    "product_name": self.order_context.get("product_name", "Unknown"),
+                    "reason": reason,
+                    "transcript": transcript,
+                },
+                timeout=5.0,
+            )
+
+    async def _publish_handoff(self, reason: str) -> None:
+        """Send the handoff to the dashboard frontend as a room data packet."""
+        await self.room.local_participant.publish_data(
+            payload=orjson.dumps(
+                {"type": "handoff", "call_id": self.call_id, "reason": reason}
+            ),
+            reliable=True,
+        )
+
     @function_tool()
     async def send_link(
         self,
@@ -103,14 +169,14 @@ Current call context:
             platform: The messaging platform to use (telegram or viber)
             link: The full URL to the product page
         """
-        logger.info(f"Sending link via {platform}: {link}")
+        logger.info("Sending link via %s: %s", platform, link)
 
         # Get phone number from participant identity
         phone = self.order_context.get("phone", "unknown")
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
+            async with self._http_client() as http:
+                response = await http.post(
                     TELEGRAM_WEBHOOK_URL,
                     json={
                         "platform": platform,
@@ -121,14 +187,14 @@ Current call context:
                     },
                     timeout=10.0,
                 )
-                response.raise_for_status()
-                logger.info(f"Link sent successfully: {response.status_code}")
-                return f"Link successfully sent via {platform}. Ask if they received it."
+            response.raise_for_status()
+            logger.info("Link sent successfully: %s", response.status_code)
+            return f"Link successfully sent via {platform}. Ask if they received it."
         except httpx.HTTPError as e:
-            logger.error(f"Failed to send link: {e}")
+            logger.error("Failed to send link: %s", e)
             return f"Sorry, I couldn't send the link via {platform} right now. Please try again later or I can give you the link verbally."
         except Exception as e:
-            logger.error(f"Unexpected error sending link: {e}")
+            logger.error("Unexpected error sending link: %s", e)
             return "There was an issue sending the link. Would you like me to read it to you instead?"
 
     @function_tool()
@@ -148,63 +214,54 @@ Current call context:
         Args:
             reason: Brief description of why the transfer is needed
         """
-        logger.info(f"Handoff requested: {reason}")
+        logger.info("Handoff requested: %s", reason)
         self._handoff_pending = True
 
-        # Update Firebase to mark handoff
-        if self.firebase and self.call_id:
-            try:
-                await self.firebase.request_handoff(self.call_id, reason)
-            except Exception as e:
-                logger.error(f"Failed to update handoff status: {e}")
-
-        # Extract conversation history for the human operator
-        transcript = []
+        # Extract recent conversation history for the human operator
+        history_items = []
         try:
-            # Get history from the session (complete conversation history)
             history = context.session.history
             if history:
-                for item in history.items:
-                    if item.type == "message" and item.text_content:
-                        speaker = 'user' if item.role == 'user' else 'agent'
-                        transcript.append({
-                            'speaker': speaker,
-                            'text': item.text_content[:500],  # Limit length
-                            'timestamp': '',
-                        })
+                history_items = history.items[-HANDOFF_TRANSCRIPT_ITEMS:]
         except Exception as e:
-            logger.warning(f"Could not extract transcript: {e}")
-
-        # Register handoff with UI dashboard (so human can take over)
-        try:
-            room_name = self.room.name if self.room else "unknown"
-            async with httpx.AsyncClient() as client:
-                await client.post(
-                    "http://localhost:3000/api/handoffs/register",
-                    json={
-                        "call_id": self.call_id,
-                        "room_name": room_name,
-                        "phone_number": self.order_context.get("phone", "Unknown"),
-                        "customer_name": self.order_context.get("customer_name", "Customer"),
-                        "product_name": self.order_context.get("product_name", "Unknown"),
-                        "reason": reason,
-                        "transcript": transcript,
-                    },
-                    timeout=5.0,
-                )
-                logger.info(f"Handoff registered with dashboard for room: {room_name}")
-        except Exception as e:
-            logger.warning(f"Could not register handoff with dashboard: {e}")
-
-        # Send data packet to notify dashboard (frontend will receive this)
-        try:
-            if self.room:
-                await self.room.local_participant.publish_data(
-                    payload=f'{{"type":"handoff","call_id":"{self.call_id}","reason":"{reason}"}}'.encode(),
-                    reliable=True,
+            logger.warning("Could not extract transcript: %s", e)
+
+        messages = [
+            item
+            for item in history_items
+            if item.type == "message" and item.text_content
+        ]
+        transcript = [
+            {
+                "speaker": "user" if item.role == "user" else "agent",
+                "text": item.text_content[:500],  # Limit length
+                "timestamp": "",
+            }
+            for item in messages
+        ]
+
+        # Notify Firebase, the UI dashboard (so human can take over) and the
+        # room's frontend concurrently - none of them depends on the others
+        room_name = self.room.name if self.room else "unknown"
+        notifications = {
+            "dashboard": self._register_handoff(room_name, reason, transcript),
+        }
+        if self.firebase and self.call_id:
+            notifications["firebase"] = self.firebase.request_handoff(
+                self.call_id, reason
+            )
+        if self.room:
+            # Data packet is received by the dashboard frontend
+            notifications["data packet"] = self._publish_handoff(reason)
+
+        results = await asyncio.gather(*notifications.values(), return_exceptions=True)
+        for target, result in zip(notifications, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    "Could not send handoff notification to %s: %s", target, result
                 )
-        except Exception as e:
-            logger.warning(f"Could not send handoff notification: {e}")
+            elif target == "dashboard":
+                logger.info("Handoff registered with dashboard for room: %s", room_name)
 
         # Put customer on hold - disable AI audio output after this message
         # The agent will say the transfer message, then go silent
@@ -220,7 +277,10 @@ server = AgentServer()
 def prewarm(proc: JobProcess) -> None:
     """Prewarm models for faster startup."""
     proc.userdata["vad"] = silero.VAD.load()
+    # The async Firestore client opens its channel on the job's loop, with the
+    # order lookup as the first request
     proc.userdata["firebase"] = FirebaseService()
+    proc.userdata["http"] = _create_http_client()
 
 
 server.setup_fnc = prewarm
@@ -235,6 +295,13 @@ async def sales_agent(ctx: JobContext) -> None:
     }
 
     firebase: FirebaseService = ctx.proc.userdata["firebase"]
+    http_client: httpx.AsyncClient = ctx.proc.userdata["http"]
+
+    # Keep references to fire-and-forget tasks until they finish
+    bg_tasks: set[asyncio.Task[None]] = ctx.proc.userdata.setdefault("bg_tasks", set())
+
+    # Release pooled connections when the job ends
+    ctx.add_shutdown_callback(http_client.aclose)
 
     # Extract phone number from first participant (for SIP calls, this is the caller)
     phone_number = "unknown"
@@ -253,7 +320,11 @@ async def sales_agent(ctx: JobContext) -> None:
         order_context=order_context,
     )
 
-    logger.info(f"Starting sales call for {phone_number}, order: {order_context.get('product_name')}")
+    logger.info(
+        "Starting sales call for %s, order: %s",
+        phone_number,
+        order_context.get("product_name"),
+    )
 
     # Create the sales agent with context
     agent = RozetkaSalesAgent(
@@ -261,6 +332,7 @@ async def sales_agent(ctx: JobContext) -> None:
         call_id=call_id,
         firebase=firebase,
         room=ctx.room,
+        http=http_client,
     )
 
     # Set up the voice session with Gemini Live API
@@ -294,7 +366,7 @@ async def sales_agent(ctx: JobContext) -> None:
     def on_participant_connected(participant: rtc.RemoteParticipant) -> None:
         """Detect when human operator joins and disable AI."""
         if participant.identity.startswith("human_operator"):
-            logger.info(f"Human operator joined: {participant.identity}")
+            logger.info("Human operator joined: %s", participant.identity)
 
             # Check if handoff was requested
             if agent._handoff_pending:
@@ -307,26 +379,25 @@ async def sales_agent(ctx: JobContext) -> None:
                     session.output.set_audio_enabled(False)
                     logger.info("AI audio disabled - human operator now handling call")
                 except Exception as e:
-                    logger.error(f"Error disabling AI audio: {e}")
+                    logger.error("Error disabling AI audio: %s", e)
 
                 # Update call status
-                import asyncio
                 task = asyncio.create_task(
                     firebase.update_call_status(call_id, "human_handling")
                 )
-                ctx.proc.userdata.setdefault("cleanup_tasks", []).append(task)
+                bg_tasks.add(task)
+                task.add_done_callback(bg_tasks.discard)
             else:
                 logger.info("Human operator joined but no handoff was requested")
 
     # Update call status when done
     @ctx.room.on("disconnected")
     def on_disconnect() -> None:
-        import asyncio
         task = asyncio.create_task(
             firebase.update_call_status(call_id, "completed")
         )
-        # Store reference to prevent garbage collection
-        ctx.proc.userdata.setdefault("cleanup_tasks", []).append(task)
+        bg_tasks.add(task)
+        task.add_done_callback(bg_tasks.discard)
 
 
 if __name__ == "__main__":
@@ -1,50 +1,59 @@
 """Firebase Firestore service for call logs, transcripts, and order data."""
 
+import asyncio
 import logging
 import os
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-logger = logging.getLogger("firebase_service")
+if TYPE_CHECKING:
+    from google.cloud.firestore import AsyncClient
 
-# Firebase initialization is optional - will use mock data if not configured
-_db = None
-_initialized = False
+logger = logging.getLogger("firebase_service")
 
+# Transcript entries are buffered and written in batches instead of one update per turn
+TRANSCRIPT_FLUSH_SIZE = 20
+TRANSCRIPT_FLUSH_INTERVAL = 2.0  # seconds
 
-def _init_firebase() -> bool:
-    """Initialize Firebase Admin SDK if credentials are available."""
-    global _db, _initialized
+# Call statuses after which no more transcript entries are expected from the agent
+_TRANSCRIPT_FINAL_STATUSES = ("completed", "handoff")
 
-    if _initialized:
-        return _db is not None
 
-    _initialized = True
+def _create_client() -> "AsyncClient | None":
+    """Create an async Firestore client if credentials are available.
 
+    Firebase is optional - without a client the service uses mock data.
+    """
     creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
     if not creds_path or not os.path.exists(creds_path):
         logger.warning("Firebase credentials not found. Using mock data mode.")
-        return False
+        return None
 
     try:
-        import firebase_admin
-        from firebase_admin import credentials, firestore
+        from google.cloud import firestore
+        from google.oauth2 import service_account
 
-        cred = credentials.Certificate(creds_path)
-        firebase_admin.initialize_app(cred)
-        _db = firestore.client()
+        cred = service_account.Credentials.from_service_account_file(creds_path)
+        db = firestore.AsyncClient(project=cred.project_id, credentials=cred)
         logger.info("Firebase initialized successfully")
-        return True
+        return db
     except Exception as e:
-        logger.warning(f"Failed to initialize Firebase: {e}. Using mock data mode.")
-        return False
+        logger.warning("Failed to initialize Firebase: %s. Using mock data mode.", e)
+        return None
 
 
 class FirebaseService:
     """Service for interacting with Firebase Firestore."""
 
     def __init__(self) -> None:
-        self._use_firebase = _init_firebase()
+        # The client's gRPC channel binds to the event loop that first uses it,
+        # so each service (created per job in prewarm) owns its own client
+        self._db = _create_client()
+        self._transcript_buffers: defaultdict[str, list[dict[str, Any]]] = defaultdict(
+            list
+        )
+        self._flush_tasks: dict[str, asyncio.Task[None]] = {}
 
     async def get_order_context(self, phone_number: str) -> dict[str, Any]:
         """Fetch order details for a customer by phone number.
@@ -55,24 +64,25 @@ class FirebaseService:
         Returns:
             Order context with product info, customer name, etc.
         """
-        if self._use_firebase and _db:
+        if self._db is not None:
             try:
-                orders_ref = _db.collection("orders")
+                orders_ref = self._db.collection("orders")
                 query = orders_ref.where("phone", "==", phone_number).limit(1)
-                docs = query.stream()
 
-                for doc in docs:
+                async for doc in query.stream():
                     data = doc.to_dict()
                     return {
                         "order_id": doc.id,
                         "customer_name": data.get("customer_name", "Customer"),
                         "product_name": data.get("product_name", "your order"),
                         "product_price": data.get("price", 0),
-                        "upsell_product": data.get("upsell_product", "a premium warranty"),
+                        "upsell_product": data.get(
+                            "upsell_product", "a premium warranty"
+                        ),
                         "upsell_price": data.get("upsell_price", 199),
                     }
             except Exception as e:
-                logger.error(f"Error fetching order: {e}")
+                logger.error("Error fetching order: %s", e)
 
         # Mock data for testing
         return {
@@ -108,15 +118,15 @@ class FirebaseService:
             "handoff_requested": False,
         }
 
-        if self._use_firebase and _db:
+        if self._db is not None:
             try:
-                doc_ref = _db.collection("calls").document()
-                doc_ref.set(call_data)
+                doc_ref = self._db.collection("calls").document()
+                await doc_ref.set(call_data)
                 return doc_ref.id
             except Exception as e:
-                logger.error(f"Error logging call start: {e}")
+                logger.error("Error logging call start: %s", e)
 
-        logger.info(f"[MOCK] Call started: {call_data}")
+        logger.info("[MOCK] Call started: %s", call_data)
         return f"mock-call-{room_name}"
 
     async def update_call_status(
@@ -128,14 +138,17 @@ class FirebaseService:
         """Update call status in Firestore."""
         update_data = {"status": status, **extra_fields}
 
-        if self._use_firebase and _db:
+        if self._db is not None:
+            if status in _TRANSCRIPT_FINAL_STATUSES:
+                await self._flush_transcript(call_id)
+
             try:
-                _db.collection("calls").document(call_id).update(update_data)
+                await self._db.collection("calls").document(call_id).update(update_data)
                 return
             except Exception as e:
-                logger.error(f"Error updating call status: {e}")
+                logger.error("Error updating call status: %s", e)
 
-        logger.info(f"[MOCK] Call {call_id} updated: {update_data}")
+        logger.info("[MOCK] Call %s updated: %s", call_id, update_data)
 
     async def request_handoff(self, call_id: str, reason: str = "") -> None:
         """Mark a call as needing human handoff."""
@@ -153,21 +166,53 @@ class FirebaseService:
         role: str,
         text: str,
     ) -> None:
-        """Append a transcript entry to a call."""
+        """Append a transcript entry to a call.
+
+        Entries are buffered and written together once TRANSCRIPT_FLUSH_SIZE
+        entries accumulate, TRANSCRIPT_FLUSH_INTERVAL seconds pass, or the call
+        is completed/handed off.
+        """
         entry = {
             "role": role,
             "text": text,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
 
-        if self._use_firebase and _db:
-            try:
-                from google.cloud.firestore import ArrayUnion
-                _db.collection("calls").document(call_id).update({
-                    "transcript": ArrayUnion([entry])
-                })
-                return
-            except Exception as e:
-                logger.error(f"Error appending transcript: {e}")
-
-        logger.info(f"[MOCK] Transcript for {call_id}: [{role}] {text}")
+        if self._db is not None:
+            buffer = self._transcript_buffers[call_id]
+            buffer.append(entry)
+            if len(buffer) >= TRANSCRIPT_FLUSH_SIZE:
+                await self._flush_transcript(call_id)
+            elif call_id not in self._flush_tasks:
+                self._flush_tasks[call_id] = asyncio.create_task(
+                    self._flush_transcript_after(call_id, TRANSCRIPT_FLUSH_INTERVAL)
+                )
+            return
+
+        logger.info("[MOCK] Transcript for %s: [%s] %s", call_id, role, text)
+
+    async def _flush_transcript_after(self, call_id: str, delay: float) -> None:
+        """Flush a call's buffered transcript entries after a delay."""
+        await asyncio.sleep(delay)
+        await self._flush_transcript(call_id)
+
+    async def _flush_transcript(self, call_id: str) -> None:
+        """Write all buffered transcript entries for a call in a single update."""
+        task = self._flush_tasks.pop(call_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+        entries = self._transcript_buffers.pop(call_id, None)
+        if not entries:
+            return
+
+        try:
+            from google.cloud.firestore import ArrayUnion
+
+            await (
+                self._db.collection("calls")
+                .document(call_id)
+                .update({"transcript": ArrayUnion(entries)})
+            )
+        except Exception as e:
+            logger.error("Error appending transcript: %s", e)
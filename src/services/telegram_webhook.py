@@ -3,7 +3,8 @@
 Uses Telethon (MTProto) to send messages directly to phone numbers
 without requiring users to start a bot first.
 
-Run with: uvicorn services.telegram_webhook:app --reload --port 8000
+Run with (from src/): python -m services.telegram_webhook
+For development: uvicorn services.telegram_webhook:app --reload --port 8000
 
 Required environment variables:
 - TELEGRAM_API_ID: Get from https://my.telegram.org/apps
@@ -13,7 +14,8 @@ Required environment variables:
 
 import logging
 import os
-from typing import Literal
+from collections import OrderedDict
+from typing import Any, Literal
 
 from pydantic import BaseModel
 
@@ -24,9 +26,13 @@ TELEGRAM_API_ID = os.getenv("TELEGRAM_API_ID")
 TELEGRAM_API_HASH = os.getenv("TELEGRAM_API_HASH")
 TELEGRAM_SESSION_STRING = os.getenv("TELEGRAM_SESSION_STRING")
 
-# Global Telethon client (initialized on first request)
+# Global Telethon client (connected on app startup)
 _telethon_client = None
 
+# Resolved input peers by normalized phone number (LRU), so repeat sends skip the lookup
+ENTITY_CACHE_SIZE = 10_000
+_entity_cache: OrderedDict[str, Any] = OrderedDict()
+
 
 class SendLinkRequest(BaseModel):
     """Request body for sending a link."""
@@ -46,6 +52,13 @@ class SendLinkResponse(BaseModel):
     platform: str
 
 
+class HealthResponse(BaseModel):
+    """Response for health check request."""
+
+    status: str
+    mtproto_configured: bool
+
+
 async def get_telethon_client():
     """Get or create the Telethon client using MTProto."""
     global _telethon_client
@@ -73,7 +86,7 @@ async def get_telethon_client():
         logger.info("Telethon client connected successfully")
         return _telethon_client
     except Exception as e:
-        logger.error(f"Failed to initialize Telethon client: {e}")
+        logger.error("Failed to initialize Telethon client: %s", e)
         return None
 
 
@@ -91,7 +104,7 @@ def create_app():
         version="1.0.0",
     )
 
-    @app.get("/health")
+    @app.get("/health", response_model=HealthResponse)
     async def health_check():
         """Health check endpoint."""
         return {"status": "healthy", "mtproto_configured": bool(TELEGRAM_API_ID)}
@@ -104,7 +117,7 @@ def create_app():
         requiring the user to start a bot first.
         """
         logger.info(
-            f"Received send_link request: {request.platform} -> {request.phone}"
+            "Received send_link request: %s -> %s", request.platform, request.phone
         )
 
         # Build the message
@@ -136,6 +149,11 @@ def create_app():
                 detail="Failed to send message",
             )
 
+    @app.on_event("startup")
+    async def startup():
+        """Connect Telethon client before the first request arrives."""
+        await get_telethon_client()
+
     @app.on_event("shutdown")
     async def shutdown():
         """Disconnect Telethon client on shutdown."""
@@ -157,7 +175,7 @@ async def _send_telegram_mtproto(phone: str, message: str) -> bool:
 
     if client is None:
         # Fall back to mock mode if not configured
-        logger.info(f"[MOCK TELEGRAM] To {phone}: {message}")
+        logger.info("[MOCK TELEGRAM] To %s: %s", phone, message)
         return True
 
     try:
@@ -167,18 +185,27 @@ async def _send_telegram_mtproto(phone: str, message: str) -> bool:
 
         # Get the user entity by phone number
         # Telethon will automatically add them to contacts if needed
-        entity = await client.get_entity(phone)
+        entity = _entity_cache.get(phone)
+        if entity is None:
+            entity = await client.get_input_entity(phone)
+            _entity_cache[phone] = entity
+            if len(_entity_cache) > ENTITY_CACHE_SIZE:
+                _entity_cache.popitem(last=False)
+        else:
+            _entity_cache.move_to_end(phone)
 
         # Send the message
         await client.send_message(entity, message)
-        logger.info(f"[TELEGRAM MTProto] Message sent to {phone}")
+        logger.info("[TELEGRAM MTProto] Message sent to %s", phone)
         return True
 
     except Exception as e:
-        logger.error(f"Failed to send Telegram message to {phone}: {e}")
+        # Don't keep reusing a peer that may have gone stale
+        _entity_cache.pop(phone, None)
+        logger.error("Failed to send Telegram message to %s: %s", phone, e)
         # Check if it's because the user doesn't have Telegram
         if "user" in str(e).lower() and "not" in str(e).lower():
-            logger.warning(f"User {phone} may not have Telegram installed")
+            logger.warning("User %s may not have Telegram installed", phone)
         return False
 
 
@@ -188,7 +215,7 @@ async def _send_viber(phone: str, message: str) -> bool:
     In production, implement using Viber Bot API or Viber Business Messages.
     """
     # Mock mode - just log
-    logger.info(f"[MOCK VIBER] To {phone}: {message}")
+    logger.info("[MOCK VIBER] To %s: %s", phone, message)
     return True
 
 
@@ -220,3 +247,19 @@ app = create_app()
 # This will prompt you to log in with your phone number and verification code.
 # Save the resulting session string to TELEGRAM_SESSION_STRING env var.
 # ============================================================================
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # A single worker on purpose: every worker would open its own MTProto
+    # connection with the same session string, which Telegram rejects
+    uvicorn.run(
+        "services.telegram_webhook:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=30,  # Let the agent's pooled HTTP client reuse connections
+        log_level="warning",
+    )
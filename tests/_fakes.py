@@ -0,0 +1,57 @@
+"""Offline stand-ins for the agent tests' network dependencies."""
+
+import json
+from typing import Any
+
+from livekit.agents import APIConnectOptions, llm, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, NotGivenOr
+
+
+class FakeLLM(llm.LLM):
+    """LLM that answers every user turn by calling one scripted tool.
+
+    Once the tool's output is in the chat context it replies with ``reply``,
+    so a full tool round trip completes without talking to Gemini.
+    """
+
+    def __init__(
+        self, tool: str, arguments: dict[str, Any], reply: str = "Done."
+    ) -> None:
+        super().__init__()
+        self.tool = tool
+        self.arguments = arguments
+        self.reply = reply
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[llm.Tool] | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
+    ) -> "FakeLLMStream":
+        return FakeLLMStream(
+            self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options
+        )
+
+
+class FakeLLMStream(llm.LLMStream):
+    """Stream emitting the single scripted chunk chosen by FakeLLM."""
+
+    _llm: FakeLLM
+
+    async def _run(self) -> None:
+        items = self.chat_ctx.items
+        if items and items[-1].type == "function_call_output":
+            delta = llm.ChoiceDelta(role="assistant", content=self._llm.reply)
+        else:
+            call = llm.FunctionToolCall(
+                name=self._llm.tool,
+                arguments=json.dumps(self._llm.arguments),
+                call_id=utils.shortuuid("call_"),
+            )
+            delta = llm.ChoiceDelta(role="assistant", tool_calls=[call])
+
+        self._event_ch.send_nowait(llm.ChatChunk(id=utils.shortuuid(), delta=delta))
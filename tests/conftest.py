@@ -0,0 +1,153 @@
+"""Shared fixtures for the Rozetka Sales Agent tests."""
+
+import asyncio
+import json
+import os
+import sys
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from google.genai import types
+from livekit.plugins import google
+from pytest_recording.plugin import get_default_cassette_name
+from vcr import VCR
+from vcr.request import Request
+from vcr.util import read_body
+
+# uvloop's scheduler cuts the per-await overhead of the many small awaits in
+# AgentSession.run (uvloop doesn't support Windows)
+if sys.platform != "win32":
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+# CI runs are latency tolerant, so they use Gemini's cheaper Flex tier.
+# Flex requests can queue for minutes, hence the much longer timeout.
+FLEX_TIER = bool(os.getenv("CI"))
+FLEX_TIMEOUT_MS = 15 * 60 * 1000
+
+HAS_CREDENTIALS = bool(
+    os.getenv("GOOGLE_API_KEY") or os.getenv("GOOGLE_GENAI_USE_VERTEXAI")
+)
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    """Skip tests that need Gemini when no credentials are configured.
+
+    Tests with a recorded cassette still run, replaying it offline.
+    """
+    if HAS_CREDENTIALS:
+        return
+
+    skip = pytest.mark.skip(reason="GOOGLE_API_KEY is not set")
+    for item in items:
+        if "llm" in getattr(item, "fixturenames", ()) and not _has_cassette(item):
+            item.add_marker(skip)
+
+
+def _has_cassette(item: pytest.Item) -> bool:
+    """Whether a VCR test can replay an existing cassette instead of recording."""
+    if (
+        item.get_closest_marker("vcr") is None
+        or item.config.getoption("--disable-recording")
+        or os.getenv("VCR_MODE") == "rewrite"
+    ):
+        return False
+
+    name = get_default_cassette_name(getattr(item, "cls", None), item.name)
+    return (item.path.parent / "cassettes" / item.path.stem / f"{name}.yaml").exists()
+
+
+# Request body keys the cassette matcher ignores
+_VOLATILE_BODY_KEYS = frozenset({"id", "serviceTier"})
+
+
+def pytest_recording_configure(config: pytest.Config, vcr: VCR) -> None:
+    """Register the body matcher used by vcr_config."""
+    vcr.register_matcher("gemini_body", _match_gemini_body)
+
+
+def _match_gemini_body(r1: Request, r2: Request) -> None:
+    """Match request bodies, ignoring fields that differ between runs.
+
+    LiveKit gives tool calls random ids, and CI adds serviceTier for Flex, so
+    cassettes recorded locally still replay there.
+    """
+    if _without_volatile(_json_body(r1)) != _without_volatile(_json_body(r2)):
+        raise AssertionError
+
+
+def _json_body(request: Request) -> Any:
+    body = read_body(request)
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body
+
+
+def _without_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: _without_volatile(v)
+            for k, v in value.items()
+            if k not in _VOLATILE_BODY_KEYS
+        }
+    if isinstance(value, list):
+        return [_without_volatile(v) for v in value]
+    return value
+
+
+@pytest.fixture(scope="session")
+def turn_timeout() -> float:
+    """Seconds a single Gemini-backed step may take before its test fails."""
+    return FLEX_TIMEOUT_MS / 1000 if FLEX_TIER else 30.0
+
+
+@pytest.fixture(scope="module")
+def vcr_config() -> dict[str, Any]:
+    """Record Gemini traffic to tests/cassettes/ and replay it on later runs.
+
+    Cassettes are recorded on the first run; set VCR_MODE=rewrite to
+    re-record them after changing prompts or tools. Requests are matched on
+    their body too, so a changed prompt fails loudly instead of replaying a
+    stale response.
+    """
+    return {
+        "filter_headers": ["authorization", "x-goog-api-key"],
+        "record_mode": os.getenv("VCR_MODE", "once"),
+        "match_on": [
+            "method",
+            "scheme",
+            "host",
+            "port",
+            "path",
+            "query",
+            "gemini_body",
+        ],
+    }
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def llm() -> AsyncIterator[google.LLM]:
+    """Gemini LLM shared by every test in the session.
+
+    One instance means one underlying client: AgentSession prewarms its
+    connection the first time (prewarm is idempotent), so later tests reuse
+    it without another TLS handshake. The plugin talks to Gemini over REST
+    with one pooled aiohttp session per event loop, so running every test on
+    the session loop keeps those connections open for the whole run.
+    """
+    options: dict[str, Any] = {}
+    if not HAS_CREDENTIALS:
+        # Only cassette replays get this far; the key is never sent for real
+        options["api_key"] = "replay-only"
+    if FLEX_TIER:
+        options["service_tier"] = types.ServiceTier.FLEX
+        options["http_options"] = types.HttpOptions(timeout=FLEX_TIMEOUT_MS)
+
+    async with google.LLM(model="gemini-2.5-flash", **options) as llm:
+        yield llm
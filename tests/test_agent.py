@@ -1,203 +1,244 @@
 """Tests for the Rozetka Sales Agent."""
 
+import asyncio
+from collections.abc import Awaitable, Sequence
+from dataclasses import asdict, dataclass
+from typing import TypeVar
+
 import pytest
-from livekit.agents import AgentSession
+from _fakes import FakeLLM
+from livekit.agents import AgentSession, mock_tools
 from livekit.plugins import google
 
 from agent import RozetkaSalesAgent
 
-
-def _llm() -> google.LLM:
-    """Create LLM for testing."""
-    return google.LLM(model="gemini-2.5-flash")
-
-
-@pytest.fixture
-def order_context() -> dict:
-    """Sample order context for testing."""
-    return {
-        "order_id": "test-123",
-        "customer_name": "John",
-        "product_name": "iPhone 15",
-        "product_price": 45999,
-        "upsell_product": "AppleCare+ Protection",
-        "upsell_price": 4999,
-        "phone": "+380501234567",
-    }
-
-
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class OrderContext:
+    """Immutable order details shared by every scenario that uses them."""
+
+    customer_name: str
+    product_name: str
+    product_price: int
+    order_id: str | None = None
+    upsell_product: str | None = None
+    upsell_price: int | None = None
+    phone: str | None = None
+
+    def as_dict(self) -> dict:
+        """Return the mapping RozetkaSalesAgent expects, without unset fields."""
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+JOHN_CTX = OrderContext(
+    order_id="test-123",
+    customer_name="John",
+    product_name="iPhone 15",
+    product_price=45999,
+    upsell_product="AppleCare+ Protection",
+    upsell_price=4999,
+    phone="+380501234567",
+)
+
+MARIA_CTX = OrderContext(
+    customer_name="Maria",
+    product_name="Laptop",
+    product_price=30000,
+    upsell_product="Extended Warranty",
+    upsell_price=2000,
+)
+
+ALEX_CTX = OrderContext(
+    customer_name="Alex",
+    product_name="TV",
+    product_price=20000,
+)
+
+SOFIA_CTX = OrderContext(
+    customer_name="Sofia",
+    product_name="Headphones",
+    product_price=5000,
+    upsell_product="Premium Carrying Case",
+    upsell_price=500,
+    phone="+380671234567",
+)
+
+
+@dataclass
+class Scenario:
+    """A single user turn and the reply expected from the agent.
+
+    When ``tool`` is set, the agent may either call that tool or reply with a
+    message matching ``intent``. Otherwise it must reply with exactly one
+    message matching ``intent``. Replies that pass the ``must_include`` /
+    ``must_not`` keyword check are accepted without asking the LLM judge.
+    """
+
+    name: str
+    order_context: OrderContext
+    user_input: str
+    intent: str
+    tool: str | None = None
+    must_include: Sequence[str] = ()
+    must_not: Sequence[str] = ()
+
+    def __post_init__(self) -> None:
+        # Collapse the indented multi-line literal into one line so the judge
+        # prompt carries no whitespace-only tokens
+        self.intent = " ".join(self.intent.split())
+
+
+def quick_check(msg: str, must_include: Sequence[str], must_not: Sequence[str]) -> bool:
+    """Cheap case-insensitive keyword check run before the LLM judge."""
+    text = msg.lower()
+    return all(word.lower() in text for word in must_include) and not any(
+        word.lower() in text for word in must_not
+    )
+
+
+async def within(aw: Awaitable[T], timeout: float, step: str) -> T:
+    """Await a network-bound step, failing the test instead of hanging CI."""
+    try:
+        return await asyncio.wait_for(aw, timeout)
+    except asyncio.TimeoutError:
+        pytest.fail(f"{step} did not finish within {timeout:.0f}s")
+
+
+SCENARIOS = [
+    Scenario(
+        name="greets_customer_by_name",
+        order_context=JOHN_CTX,
+        user_input="Hello",
+        intent="""
+        Greets the user in a friendly manner and identifies as being from Rozetka.
+        May mention the customer's name (John) or their recent order.
+        Should be professional and warm.
+        """,
+        must_include=("John", "Rozetka"),
+    ),
+    Scenario(
+        name="offers_upsell_naturally",
+        order_context=JOHN_CTX,
+        user_input="Yes, I just ordered an iPhone. Everything is fine with my order.",
+        intent="""
+        Acknowledges the order confirmation and naturally transitions to
+        mentioning the upsell product (AppleCare+ Protection or similar protection plan).
+        Should not be pushy or aggressive - just a natural mention of the benefit.
+        """,
+        must_include=("AppleCare",),
+    ),
+    Scenario(
+        name="respects_customer_decline",
+        order_context=MARIA_CTX,
+        user_input="No thanks, I'm not interested in any additional products.",
+        intent="""
+        Gracefully accepts the customer's decision without being pushy.
+        Thanks them for their order and/or wishes them well.
+        Does NOT continue to push the upsell product.
+        """,
+        must_include=("thank",),
+        must_not=("warranty", "protection"),
+    ),
+    Scenario(
+        name="transfer_to_human_request",
+        order_context=ALEX_CTX,
+        user_input="I want to speak with a real person, not an AI.",
+        intent="""
+        Acknowledges the request to speak with a human representative.
+        Indicates they will transfer the call or connect them with someone.
+        """,
+        tool="transfer_to_human",
+    ),
+    Scenario(
+        name="send_link_on_interest",
+        order_context=SOFIA_CTX,
+        user_input="That case sounds interesting, can you send me more info about it?",
+        intent="""
+        Offers to send more information about the product.
+        May ask which platform (Telegram/Viber) to send it to,
+        or indicate they will send a link.
+        """,
+        tool="send_link",
+    ),
+]
+
+
+# Deterministic stand-ins for the agent's tools in the Gemini-backed tests
+TOOL_MOCKS = {
+    "send_link": lambda: "Link successfully sent. Ask if they received it.",
+    "transfer_to_human": lambda: "Connecting you with a team member now.",
+}
+
+
+@pytest.mark.slow
 @pytest.mark.asyncio
-async def test_greets_customer_by_name(order_context: dict) -> None:
-    """Test that the agent greets the customer by name."""
-    async with (
-        _llm() as llm,
-        AgentSession(llm=llm) as session,
-    ):
-        agent = RozetkaSalesAgent(order_context=order_context)
+@pytest.mark.vcr
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda s: s.name)
+async def test_agent(llm: google.LLM, scenario: Scenario, turn_timeout: float) -> None:
+    """Test the agent's reply to a single customer turn."""
+    async with AgentSession(llm=llm) as session:
+        # Agents keep their chat context and activity once started, so each
+        # scenario builds a fresh one rather than reusing a cached instance
+        agent = RozetkaSalesAgent(order_context=scenario.order_context.as_dict())
         await session.start(agent)
 
-        result = await session.run(user_input="Hello")
-
-        await (
-            result.expect.next_event()
-            .is_message(role="assistant")
-            .judge(
-                llm,
-                intent="""
-                Greets the user in a friendly manner and identifies as being from Rozetka.
-                May mention the customer's name (John) or their recent order.
-                Should be professional and warm.
-                """,
+        # Real tools would hit the local webhook and dashboard inside the
+        # cassette, making the follow-up request differ between runs
+        with mock_tools(RozetkaSalesAgent, TOOL_MOCKS):
+            result = await within(
+                session.run(user_input=scenario.user_input),
+                turn_timeout,
+                "Agent reply",
             )
-        )
-
-        result.expect.no_more_events()
-
 
-@pytest.mark.asyncio
-async def test_offers_upsell_naturally(order_context: dict) -> None:
-    """Test that the agent can offer an upsell product."""
-    async with (
-        _llm() as llm,
-        AgentSession(llm=llm) as session,
-    ):
-        agent = RozetkaSalesAgent(order_context=order_context)
-        await session.start(agent)
-
-        result = await session.run(
-            user_input="Yes, I just ordered an iPhone. Everything is fine with my order."
-        )
-
-        await (
-            result.expect.next_event()
-            .is_message(role="assistant")
-            .judge(
-                llm,
-                intent="""
-                Acknowledges the order confirmation and naturally transitions to
-                mentioning the upsell product (AppleCare+ Protection or similar protection plan).
-                Should not be pushy or aggressive - just a natural mention of the benefit.
-                """,
+        event = result.expect.next_event()
+
+        # Calling the expected tool is as good as announcing it
+        if scenario.tool and event.event().type == "function_call":
+            event.is_function_call(name=scenario.tool)
+            return
+
+        message = event.is_message(role="assistant")
+        text = message.event().item.text_content or ""
+        has_keywords = bool(scenario.must_include or scenario.must_not)
+        if not (
+            has_keywords and quick_check(text, scenario.must_include, scenario.must_not)
+        ):
+            await within(
+                message.judge(llm, intent=scenario.intent), turn_timeout, "Judgement"
             )
-        )
 
-        result.expect.no_more_events()
+        if not scenario.tool:
+            result.expect.no_more_events()
 
 
-@pytest.mark.asyncio
-async def test_respects_customer_decline() -> None:
-    """Test that the agent gracefully handles customer declining the upsell."""
-    async with (
-        _llm() as llm,
-        AgentSession(llm=llm) as session,
-    ):
-        agent = RozetkaSalesAgent(
-            order_context={
-                "customer_name": "Maria",
-                "product_name": "Laptop",
-                "product_price": 30000,
-                "upsell_product": "Extended Warranty",
-                "upsell_price": 2000,
-            }
-        )
-        await session.start(agent)
-
-        result = await session.run(
-            user_input="No thanks, I'm not interested in any additional products."
-        )
-
-        await (
-            result.expect.next_event()
-            .is_message(role="assistant")
-            .judge(
-                llm,
-                intent="""
-                Gracefully accepts the customer's decision without being pushy.
-                Thanks them for their order and/or wishes them well.
-                Does NOT continue to push the upsell product.
-                """,
-            )
-        )
-
-        result.expect.no_more_events()
+# Arguments the fake LLM passes when scripting each scenario's tool call
+TOOL_ARGUMENTS = {
+    "transfer_to_human": {"reason": "Customer asked for a human"},
+    "send_link": {"platform": "telegram", "link": "https://rozetka.com.ua/"},
+}
 
 
+@pytest.mark.smoke
 @pytest.mark.asyncio
-async def test_transfer_to_human_request() -> None:
-    """Test that the agent recognizes request to speak with a human."""
-    async with (
-        _llm() as llm,
-        AgentSession(llm=llm) as session,
-    ):
-        agent = RozetkaSalesAgent(
-            order_context={
-                "customer_name": "Alex",
-                "product_name": "TV",
-                "product_price": 20000,
-            }
-        )
+@pytest.mark.parametrize(
+    "scenario", [s for s in SCENARIOS if s.tool], ids=lambda s: s.name
+)
+async def test_tool_call_offline(scenario: Scenario) -> None:
+    """Test the tool round trip with a scripted LLM and mocked tools."""
+    fake_llm = FakeLLM(tool=scenario.tool, arguments=TOOL_ARGUMENTS[scenario.tool])
+    async with AgentSession(llm=fake_llm) as session:
+        agent = RozetkaSalesAgent(order_context=scenario.order_context.as_dict())
         await session.start(agent)
 
-        result = await session.run(
-            user_input="I want to speak with a real person, not an AI."
-        )
+        with mock_tools(RozetkaSalesAgent, {scenario.tool: lambda: "ok"}):
+            result = await session.run(user_input=scenario.user_input)
 
-        # Should either call the transfer_to_human tool or acknowledge the request
-        event = await result.expect.next_event()
-
-        # Check if it's a tool call or a message acknowledging the transfer
-        if event.type == "function_call":
-            assert event.function_name == "transfer_to_human"
-        else:
-            await (
-                event.is_message(role="assistant")
-                .judge(
-                    llm,
-                    intent="""
-                    Acknowledges the request to speak with a human representative.
-                    Indicates they will transfer the call or connect them with someone.
-                    """,
-                )
-            )
-
-
-@pytest.mark.asyncio
-async def test_send_link_on_interest() -> None:
-    """Test that the agent offers to send a link when customer shows interest."""
-    async with (
-        _llm() as llm,
-        AgentSession(llm=llm) as session,
-    ):
-        agent = RozetkaSalesAgent(
-            order_context={
-                "customer_name": "Sofia",
-                "product_name": "Headphones",
-                "product_price": 5000,
-                "upsell_product": "Premium Carrying Case",
-                "upsell_price": 500,
-                "phone": "+380671234567",
-            }
+        result.expect.next_event().is_function_call(
+            name=scenario.tool, arguments=TOOL_ARGUMENTS[scenario.tool]
         )
-        await session.start(agent)
-
-        result = await session.run(
-            user_input="That case sounds interesting, can you send me more info about it?"
-        )
-
-        # Should either call send_link tool or offer to send the link
-        event = await result.expect.next_event()
-
-        if event.type == "function_call":
-            assert event.function_name == "send_link"
-        else:
-            await (
-                event.is_message(role="assistant")
-                .judge(
-                    llm,
-                    intent="""
-                    Offers to send more information about the product.
-                    May ask which platform (Telegram/Viber) to send it to,
-                    or indicate they will send a link.
-                    """,
-                )
-            )
+        result.expect.next_event().is_function_call_output(output="ok")
+        result.expect.next_event().is_message(role="assistant")
+        result.expect.no_more_events()
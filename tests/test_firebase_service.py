@@ -0,0 +1,108 @@
+"""Tests for transcript batching in FirebaseService."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from google.cloud.firestore import ArrayUnion
+
+from services import firebase_service
+from services.firebase_service import FirebaseService
+
+
+class FakeDocument:
+    """Firestore document stand-in that records every update."""
+
+    def __init__(self, db: "FakeDB", path: str) -> None:
+        self._db = db
+        self._path = path
+
+    async def update(self, data: dict[str, Any]) -> None:
+        self._db.updates.append((self._path, data))
+
+
+class FakeCollection:
+    def __init__(self, db: "FakeDB", name: str) -> None:
+        self._db = db
+        self._name = name
+
+    def document(self, doc_id: str) -> FakeDocument:
+        return FakeDocument(self._db, f"{self._name}/{doc_id}")
+
+
+class FakeDB:
+    """Minimal async Firestore client recording document updates in order."""
+
+    def __init__(self) -> None:
+        self.updates: list[tuple[str, dict[str, Any]]] = []
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+
+@pytest.fixture
+def db() -> FakeDB:
+    return FakeDB()
+
+
+@pytest.fixture
+def service(db: FakeDB) -> FirebaseService:
+    service = FirebaseService()
+    service._db = db
+    return service
+
+
+def transcript_texts(update: dict[str, Any]) -> list[str]:
+    union = update["transcript"]
+    assert isinstance(union, ArrayUnion)
+    return [entry["text"] for entry in union.values]
+
+
+async def test_flushes_when_buffer_is_full(
+    service: FirebaseService, db: FakeDB
+) -> None:
+    """Test that a full buffer is written at once, in a single update."""
+    for i in range(firebase_service.TRANSCRIPT_FLUSH_SIZE):
+        await service.append_transcript("call-1", "user", f"line {i}")
+
+    assert len(db.updates) == 1
+    path, update = db.updates[0]
+    assert path == "calls/call-1"
+    assert transcript_texts(update) == [
+        f"line {i}" for i in range(firebase_service.TRANSCRIPT_FLUSH_SIZE)
+    ]
+    assert "call-1" not in service._flush_tasks
+
+
+async def test_flushes_after_interval(
+    service: FirebaseService, db: FakeDB, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a partial buffer is written once the flush interval passes."""
+    monkeypatch.setattr(firebase_service, "TRANSCRIPT_FLUSH_INTERVAL", 0.01)
+
+    await service.append_transcript("call-1", "user", "hello")
+    await service.append_transcript("call-1", "agent", "hi there")
+    assert db.updates == []
+
+    await service._flush_tasks["call-1"]
+
+    assert len(db.updates) == 1
+    assert transcript_texts(db.updates[0][1]) == ["hello", "hi there"]
+    assert "call-1" not in service._flush_tasks
+
+
+async def test_completed_status_flushes_and_cancels_timer(
+    service: FirebaseService, db: FakeDB
+) -> None:
+    """Test that completing a call writes pending entries before the status."""
+    await service.append_transcript("call-1", "user", "bye")
+    timer = service._flush_tasks["call-1"]
+
+    await service.update_call_status("call-1", "completed")
+    await asyncio.sleep(0)
+
+    assert [path for path, _ in db.updates] == ["calls/call-1", "calls/call-1"]
+    assert transcript_texts(db.updates[0][1]) == ["bye"]
+    assert db.updates[1][1] == {"status": "completed"}
+    assert timer.cancelled()
+    assert "call-1" not in service._flush_tasks